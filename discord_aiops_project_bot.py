@@ -1,10 +1,13 @@
 import os
+import re
 import sqlite3
-import json
 import logging
 from datetime import datetime, date, timedelta
 import io
 import asyncio
+import threading
+import time
+from functools import lru_cache
 
 import discord
 from discord.ext import commands, tasks
@@ -20,124 +23,254 @@ GANTT_START = os.environ.get("GANTT_START", "2025-09-21")
 GANTT_END = os.environ.get("GANTT_END", "2026-02-08")
 REMINDER_HOURS = int(os.environ.get("REMINDER_HOURS", "48"))
 REMINDER_LOOP_MINUTES = int(os.environ.get("REMINDER_LOOP_MINUTES", "60"))
+REMINDER_CONCURRENCY = int(os.environ.get("REMINDER_CONCURRENCY", "5"))
+PROGRESS_BAR_LENGTH = 20
+# A message view holds at most 25 components and each task has two buttons.
+ANNOUNCE_CHUNK_SIZE = 12
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("project_bot")
 
+SQL_CREATE_TASKS = """
+CREATE TABLE IF NOT EXISTS {table} (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          title TEXT NOT NULL,
+          description TEXT,
+          due_date TEXT,
+          due_ts INTEGER,
+          created_by INTEGER,
+          created_at INTEGER,
+          completed INTEGER DEFAULT 0,
+          claimed_by TEXT DEFAULT '[]',
+          week_start TEXT
+)
+"""
+SQL_INSERT_TASK = (
+    "INSERT INTO tasks (title, description, due_date, due_ts, created_by, created_at, week_start) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+# Task rows for listings and announcements, with claimer ids pre-joined as "id1,id2".
+SQL_TASK_COLUMNS = (
+    "SELECT t.id, t.title, t.due_date, t.completed, t.week_start, "
+    "COALESCE(GROUP_CONCAT(c.user_id, ','), '') AS claimers "
+    "FROM tasks t LEFT JOIN task_claims c ON c.task_id = t.id "
+)
+SQL_GET_TASKS_FOR_WEEK = SQL_TASK_COLUMNS + "WHERE t.week_start = ? GROUP BY t.id ORDER BY t.due_date"
+SQL_GET_OPEN_TASKS_FOR_WEEK = SQL_TASK_COLUMNS + "WHERE t.week_start = ? AND t.completed = 0 GROUP BY t.id ORDER BY t.due_date"
+SQL_GET_TASK = SQL_TASK_COLUMNS + "WHERE t.id = ? GROUP BY t.id"
+SQL_IS_CLAIMED_BY = "SELECT 1 FROM task_claims WHERE task_id = ? AND user_id = ?"
+SQL_CLAIM_TASK = "INSERT OR IGNORE INTO task_claims (task_id, user_id) SELECT id, ? FROM tasks WHERE id = ?"
+SQL_UNCLAIM_TASK = "DELETE FROM task_claims WHERE task_id = ? AND user_id = ?"
+SQL_COMPLETE_TASK = "UPDATE tasks SET completed = 1 WHERE id = ?"
+SQL_GET_TASKS_FOR_TASK_WEEK = (
+    SQL_TASK_COLUMNS + "WHERE t.week_start = (SELECT week_start FROM tasks WHERE id = ?) GROUP BY t.id ORDER BY t.due_date"
+)
+SQL_WEEK_PROGRESS = "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks WHERE week_start = ?"
+SQL_DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+SQL_SAVE_ANNOUNCEMENT = "INSERT OR REPLACE INTO announcements (message_id, week_start) VALUES (?, ?)"
+SQL_GET_ANNOUNCEMENT_WEEK = "SELECT week_start FROM announcements WHERE message_id = ?"
+SQL_GET_DUE_TASKS = SQL_TASK_COLUMNS + "WHERE t.completed = 0 AND t.due_ts BETWEEN ? AND ? GROUP BY t.id"
+
 _conn = None
+_conn_lock = threading.Lock()
+_write_lock = threading.Lock()
 
 def get_conn():
     global _conn
     if _conn is None:
-        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        _conn.row_factory = sqlite3.Row
+        with _conn_lock:
+            if _conn is None:
+                conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA mmap_size=134217728")
+                conn.execute("PRAGMA cache_size=-20000")
+                conn.execute("PRAGMA foreign_keys=ON")
+                _conn = conn
     return _conn
 
 def init_db():
     conn = get_conn()
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS tasks (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              title TEXT NOT NULL,
-              description TEXT,
-              due_date TEXT,
-              created_by INTEGER,
-              created_at TEXT,
-              completed INTEGER DEFAULT 0,
-              claimed_by TEXT DEFAULT '[]',
-              week_start TEXT
-    )
-    """)
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS announcements (
-              message_id INTEGER PRIMARY KEY,
-              week_start TEXT
-    )
-    """)
-    conn.commit()
+    with _write_lock:
+        c = conn.cursor()
+        c.execute(SQL_CREATE_TASKS.format(table="tasks"))
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS announcements (
+                  message_id INTEGER PRIMARY KEY,
+                  week_start TEXT
+        )
+        """)
+        columns = {r["name"]: r["type"] for r in c.execute("PRAGMA table_info(tasks)")}
+        if "due_ts" not in columns:
+            c.execute("ALTER TABLE tasks ADD COLUMN due_ts INTEGER")
+        if columns["created_at"].upper() != "INTEGER":
+            # created_at used to be TEXT (ISO strings); TEXT affinity would turn new epoch
+            # integers into text too, so rebuild the table with an INTEGER column.
+            conn.commit()
+            c.execute("PRAGMA foreign_keys=OFF")
+            c.execute("BEGIN")
+            c.execute(SQL_CREATE_TASKS.format(table="tasks_new"))
+            c.execute("""
+            INSERT INTO tasks_new (id, title, description, due_date, due_ts, created_by, created_at, completed, claimed_by, week_start)
+            SELECT id, title, description, due_date, due_ts, created_by,
+                   CASE
+                       WHEN typeof(created_at) = 'text' AND created_at LIKE '____-__-__T%'
+                           THEN CAST(strftime('%s', created_at) AS INTEGER)
+                       WHEN typeof(created_at) = 'text' AND created_at != '' AND created_at NOT GLOB '*[^0-9]*'
+                           THEN CAST(created_at AS INTEGER)
+                       ELSE created_at
+                   END,
+                   completed, claimed_by, week_start
+            FROM tasks
+            """)
+            c.execute("DROP TABLE tasks")
+            c.execute("ALTER TABLE tasks_new RENAME TO tasks")
+            conn.commit()
+            c.execute("PRAGMA foreign_keys=ON")
+        for r in c.execute("SELECT id, due_date FROM tasks WHERE due_ts IS NULL AND due_date IS NOT NULL").fetchall():
+            try:
+                due_ts = due_timestamp(parse_date(r["due_date"]))
+            except ValueError:
+                continue
+            c.execute("UPDATE tasks SET due_ts = ? WHERE id = ?", (due_ts, r["id"]))
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(completed, due_ts)")
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS task_claims (
+                  task_id INTEGER REFERENCES tasks(id) ON DELETE CASCADE,
+                  user_id INTEGER,
+                  PRIMARY KEY (task_id, user_id)
+        )
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_task_claims_user ON task_claims(user_id)")
+        # Migrate claimers still stored in the legacy JSON column. An empty string meant
+        # "no claimers"; anything else that isn't valid JSON is left in place and logged.
+        c.execute("UPDATE tasks SET claimed_by = '[]' WHERE claimed_by = ''")
+        for r in c.execute(
+            "SELECT id, claimed_by FROM tasks WHERE claimed_by IS NOT NULL AND claimed_by != '[]' AND NOT json_valid(claimed_by)"
+        ).fetchall():
+            logger.warning("claimed_by illisible pour la tâche #%s, non migré: %r", r["id"], r["claimed_by"])
+        c.execute("""
+        INSERT OR IGNORE INTO task_claims (task_id, user_id)
+        SELECT t.id, j.value FROM tasks t, json_each(t.claimed_by) j
+        WHERE t.claimed_by IS NOT NULL AND t.claimed_by != '[]' AND json_valid(t.claimed_by)
+        """)
+        c.execute("UPDATE tasks SET claimed_by = '[]' WHERE claimed_by IS NOT NULL AND claimed_by != '[]' AND json_valid(claimed_by)")
+        conn.commit()
 
 def iso_date(d: date):
     return d.isoformat()
 
 def parse_date(s: str) -> date:
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        pass
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y"):
         try:
             return datetime.strptime(s, fmt).date()
         except Exception:
             pass
     raise ValueError("Date format should be YYYY-MM-DD or DD/MM/YYYY")
 
+@lru_cache(maxsize=32)
+def _monday_iso(ord_: int) -> str:
+    d = date.fromordinal(ord_)
+    return date.fromordinal(ord_ - d.weekday()).isoformat()
+
+def due_timestamp(d: date) -> int:
+    return int(datetime.combine(d, datetime.max.time()).timestamp())
+
 def add_task(title, due_date_str, description, created_by):
     due = parse_date(due_date_str)
-    week_start = (due - timedelta(days=due.weekday())).isoformat()
+    week_start = _monday_iso(due.toordinal())
     conn = get_conn()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO tasks (title, description, due_date, created_by, created_at, week_start) VALUES (?, ?, ?, ?, ?, ?)",
-        (title, description or "", due.isoformat(), created_by, datetime.utcnow().isoformat(), week_start),
-    )
-    conn.commit()
+    with _write_lock:
+        c = conn.execute(
+            SQL_INSERT_TASK,
+            (title, description or "", due.isoformat(), due_timestamp(due), created_by, int(time.time()), week_start),
+        )
+        conn.commit()
     return c.lastrowid
 
 def get_tasks_for_week(week_start_iso: str):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM tasks WHERE week_start = ? ORDER BY due_date", (week_start_iso,))
-    rows = c.fetchall()
-    return [dict(r) for r in rows]
+    return get_conn().execute(SQL_GET_TASKS_FOR_WEEK, (week_start_iso,)).fetchall()
 
 def get_open_tasks_for_week(week_start_iso: str):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM tasks WHERE week_start = ? AND completed = 0 ORDER BY due_date", (week_start_iso,))
-    rows = c.fetchall()
-    return [dict(r) for r in rows]
+    return get_conn().execute(SQL_GET_OPEN_TASKS_FOR_WEEK, (week_start_iso,)).fetchall()
 
 def get_task(task_id):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-    row = c.fetchone()
-    return dict(row) if row else None
+    return get_conn().execute(SQL_GET_TASK, (task_id,)).fetchone()
+
+def get_week_progress(week_start_iso: str):
+    total, done = get_conn().execute(SQL_WEEK_PROGRESS, (week_start_iso,)).fetchone()
+    return done, total
+
+def get_due_tasks(start_ts: int, end_ts: int):
+    return get_conn().execute(SQL_GET_DUE_TASKS, (start_ts, end_ts)).fetchall()
+
+def is_claimed_by(task_id, user_id):
+    return get_conn().execute(SQL_IS_CLAIMED_BY, (task_id, user_id)).fetchone() is not None
+
+def get_task_and_week(conn, task_id):
+    tasks_week = conn.execute(SQL_GET_TASKS_FOR_TASK_WEEK, (task_id,)).fetchall()
+    task = next((t for t in tasks_week if t["id"] == task_id), None)
+    return task, tasks_week
 
 def claim_task(task_id, user_id):
     conn = get_conn()
-    c = conn.cursor()
-    task = get_task(task_id)
-    if not task:
-        return None
-    claimed = json.loads(task.get("claimed_by") or "[]")
-    if user_id not in claimed:
-        claimed.append(user_id)
-    c.execute("UPDATE tasks SET claimed_by = ? WHERE id = ?", (json.dumps(claimed), task_id))
-    conn.commit()
-    return claimed
+    with _write_lock:
+        conn.execute(SQL_CLAIM_TASK, (user_id, task_id))
+        task, tasks_week = get_task_and_week(conn, task_id)
+        conn.commit()
+    return task, tasks_week
 
 def unclaim_task(task_id, user_id):
     conn = get_conn()
-    c = conn.cursor()
-    task = get_task(task_id)
-    if not task:
-        return None
-    claimed = json.loads(task.get("claimed_by") or "[]")
-    if user_id in claimed:
-        claimed.remove(user_id)
-    c.execute("UPDATE tasks SET claimed_by = ? WHERE id = ?", (json.dumps(claimed), task_id))
-    conn.commit()
-    return claimed
-
-def complete_task(task_id):
+    with _write_lock:
+        conn.execute(SQL_UNCLAIM_TASK, (task_id, user_id))
+        conn.commit()
+
+def complete_task(task_id, fetch_week=False):
     conn = get_conn()
-    c = conn.cursor()
-    c.execute("UPDATE tasks SET completed = 1 WHERE id = ?", (task_id,))
-    conn.commit()
+    with _write_lock:
+        conn.execute(SQL_COMPLETE_TASK, (task_id,))
+        result = get_task_and_week(conn, task_id) if fetch_week else None
+        conn.commit()
+    return result
+
+_gantt_cache = {}
+_gantt_base = None
+_gantt_base_key = None
+
+def load_gantt_base(image_path, mtime):
+    global _gantt_base, _gantt_base_key
+    if _gantt_base is None or _gantt_base_key != (image_path, mtime):
+        img = Image.open(image_path)
+        img.load()
+        # The marker is opaque, so only keep an alpha channel if the chart actually uses it.
+        if img.mode != "RGB":
+            if "A" in img.getbands() and img.getchannel("A").getextrema()[0] < 255:
+                img = img.convert("RGBA")
+            else:
+                img = img.convert("RGB")
+        _gantt_base = img
+        _gantt_base_key = (image_path, mtime)
+    return _gantt_base
 
 def overlay_gantt_with_today(image_path, project_start_str, project_end_str):
     GANTT_LEFT_MARGIN = 380
     GANTT_RIGHT_MARGIN = 30
 
-    base_img = Image.open(image_path).convert("RGBA")
+    today = date.today()
+    mtime = os.path.getmtime(image_path)
+    key = (image_path, mtime, project_start_str, project_end_str, today.isoformat())
+    cached = _gantt_cache.get(key)
+    if cached is not None:
+        return io.BytesIO(cached)
+
+    base_img = load_gantt_base(image_path, mtime).copy()
     draw = ImageDraw.Draw(base_img)
 
     start = parse_date(project_start_str)
@@ -146,7 +279,6 @@ def overlay_gantt_with_today(image_path, project_start_str, project_end_str):
     if total_days <= 0:
         total_days = 1
     
-    today = date.today()
     width = base_img.width
 
     bar_left = GANTT_LEFT_MARGIN
@@ -159,10 +291,12 @@ def overlay_gantt_with_today(image_path, project_start_str, project_end_str):
     else:
         pos = bar_left + (bar_right - bar_left) * (today - start).days / total_days
     
-    draw.line([pos, 0, pos, base_img.height], fill=(255, 0, 0, 255), width=4)
+    draw.line([pos, 0, pos, base_img.height], fill=(255, 0, 0), width=4)
 
     b = io.BytesIO()
-    base_img.save(b, format="PNG")
+    base_img.save(b, format="PNG", optimize=False, compress_level=1)
+    _gantt_cache.clear()
+    _gantt_cache[key] = b.getvalue()
     b.seek(0)
     return b
 
@@ -206,10 +340,9 @@ async def _addtask(ctx, title: str, due_date: str, *, description: str = ""):
 @bot.command(name="listtasks")
 async def _listtasks(ctx, week_start: str = None):
     if week_start is None:
-        today = date.today()
-        week_start = (today - timedelta(days=today.weekday())).isoformat()
+        week_start = _monday_iso(date.today().toordinal())
     try:
-        parse_date(week_start)
+        week_start = _monday_iso(parse_date(week_start).toordinal())
     except ValueError:
         await ctx.send("Date de début de semaine invalide. Format attendu: YYYY-MM-DD")
         return
@@ -219,9 +352,9 @@ async def _listtasks(ctx, week_start: str = None):
         return
     lines = []
     for t in tasks_week:
-        claimer_ids = json.loads(t.get("claimed_by") or "[]")
+        claimer_ids = t["claimers"].split(",") if t["claimers"] else []
         claimer_names = ", ".join([f"<@{i}>" for i in claimer_ids]) or "(personne)"
-        status = "✅" if t.get("completed") else "🔲"
+        status = "✅" if t["completed"] else "🔲"
         lines.append(f"#{t['id']} {status} {t['title']} — due {t['due_date']} — {claimer_names}")
     await ctx.send("\n".join(lines))
 
@@ -231,10 +364,9 @@ async def _announce_week(ctx, week_start: str = None):
         await ctx.send(f"L'annonce doit être faite dans le salon dédié (ID {PROJECT_CHANNEL_ID}).")
         return
     if week_start is None:
-        today = date.today()
-        week_start = (today - timedelta(days=today.weekday())).isoformat()
+        week_start = _monday_iso(date.today().toordinal())
     try:
-        parse_date(week_start)
+        week_start = _monday_iso(parse_date(week_start).toordinal())
     except ValueError:
         await ctx.send("Date de début de semaine invalide. Format attendu: YYYY-MM-DD")
         return
@@ -243,91 +375,127 @@ async def _announce_week(ctx, week_start: str = None):
         await ctx.send("Aucune tâche ouverte pour cette semaine.")
         return
     
-    embed = discord.Embed(title=f"Tâches semaine {week_start}")
-    for t in tasks_week:
-        claimer_ids = json.loads(t.get("claimed_by") or "[]")
-        claimer_names = ", ".join([f"<@{i}>" for i in claimer_ids]) or "(personne)"
-        embed.add_field(name=f"#{t['id']} {t['title']}", value=f"Due {t['due_date']} — Claimers: {claimer_names}", inline=False)
-    
-    view = View(timeout=None)
+    for chunk in announcement_chunks(tasks_week):
+        view, embed = build_announcement(week_start, chunk)
+        message = await ctx.send(embed=embed, view=view)
+        save_announcement(message.id, week_start)
 
-    for t in tasks_week:
-        task_id = t['id']
-        btn_claim = Button(label=f"Claim #{task_id}", style=discord.ButtonStyle.secondary, custom_id=f"claim_{task_id}")
-        btn_complete = Button(label=f"Complete #{task_id}", style=discord.ButtonStyle.success, custom_id=f"complete_{task_id}")
-
-        async def make_claim_callback(interaction, task_id=task_id):
-            claimed = claim_task(task_id, interaction.user.id)
-            ann = get_announcement_for_message(interaction.message.id)
-            if not ann:
-                wk = week_start
-            else:
-                wk = ann['week_start']
-            await refresh_announcement(interaction.message, wk)
-            await interaction.response.send_message(f"Vous avez claimé la tâche #{task_id}.", ephemeral=True)
-
-        async def make_complete_callback(interaction, task_id=task_id):
-            tdata = get_task(task_id)
-            claimed = json.loads(tdata.get('claimed_by') or '[]')
-            if interaction.user.id in claimed or interaction.user.guild_permissions.manage_messages:
-                complete_task(task_id)
-                await refresh_announcement(interaction.message, week_start)
-                await interaction.response.send_message(f"Tâche #{task_id} marquée comme complétée.", ephemeral=True)
-            else:
-                await interaction.response.send_message("Vous devez être claimé sur cette tâche pour la marquer comme complétée.", ephemeral=True)
-        
-        btn_claim.callback = make_claim_callback
-        btn_complete.callback = make_complete_callback
-        view.add_item(btn_claim)
-        view.add_item(btn_complete)
-    
-    message = await ctx.send(embed=embed, view=view)
+def save_announcement(message_id, week_start):
     conn = get_conn()
-    c = conn.cursor()
-    c.execute("INSERT OR REPLACE INTO announcements (message_id, week_start) VALUES (?, ?)", (message.id, week_start))
-    conn.commit()
+    with _write_lock:
+        conn.execute(SQL_SAVE_ANNOUNCEMENT, (message_id, week_start))
+        conn.commit()
 
 def get_announcement_for_message(message_id):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM annoucements WHERE message_id = ?", (message_id, ))
-    row = c.fetchone()
-    return dict(row) if row else None
-
-async def refresh_announcement(message, week_start):
-    tasks_week = get_tasks_for_week(week_start)
+    row = get_conn().execute(SQL_GET_ANNOUNCEMENT_WEEK, (message_id,)).fetchone()
+    return row[0] if row else None
+
+EMBED_FIELD_NAME_LIMIT = 256
+EMBED_FIELD_VALUE_LIMIT = 1024
+EMBED_TOTAL_LIMIT = 6000
+
+def task_field(t, max_claimers=None):
+    claimer_ids = t["claimers"].split(",") if t["claimers"] else []
+    listed = claimer_ids if max_claimers is None else claimer_ids[:max_claimers]
+    claimer_names = ", ".join([f"<@{i}>" for i in listed]) or "(personne)"
+    if len(listed) < len(claimer_ids):
+        more = f"… +{len(claimer_ids) - len(listed)}"
+        claimer_names = f"{claimer_names} {more}" if listed else more
+    status = "✅" if t["completed"] else "🔲"
+    name = f"#{t['id']} {status} {t['title']}"
+    value = f"Due {t['due_date']} — Claimers: {claimer_names}"
+    return name[:EMBED_FIELD_NAME_LIMIT], value
+
+def announcement_fields(week_start, tasks_week):
+    # Fit Discord's per-field and per-embed limits by listing fewer claimers, never by
+    # dropping tasks. With no claimers listed, a full chunk stays well under the budget.
+    budget = EMBED_TOTAL_LIMIT - len(f"Tâches semaine {week_start}")
+    max_claimers = None
+    while True:
+        fields = [task_field(t, max_claimers) for t in tasks_week]
+        fits = sum(len(n) + len(v) for n, v in fields) <= budget and all(len(v) <= EMBED_FIELD_VALUE_LIMIT for n, v in fields)
+        if fits or max_claimers == 0:
+            return fields
+        if max_claimers is None:
+            max_claimers = max(len(t["claimers"].split(",")) if t["claimers"] else 0 for t in tasks_week)
+        max_claimers -= 1
+
+def announcement_chunks(tasks_week):
+    for i in range(0, len(tasks_week), ANNOUNCE_CHUNK_SIZE):
+        yield tasks_week[i:i + ANNOUNCE_CHUNK_SIZE]
+
+_FIELD_TASK_ID_RE = re.compile(r"^#(\d+) ")
+
+def tasks_for_message(message, tasks_week, task_id):
+    by_id = {t['id']: t for t in tasks_week}
+    shown = []
+    for field in (message.embeds[0].fields if message.embeds else []):
+        m = _FIELD_TASK_ID_RE.match(field.name)
+        if m and int(m[1]) in by_id:
+            shown.append(by_id[int(m[1])])
+    if shown:
+        return shown
+    for chunk in announcement_chunks(tasks_week):
+        if task_id in (t['id'] for t in chunk):
+            return chunk
+    return []
+
+_CUSTOM_ID_RE = re.compile(r"^(claim|complete)_(\d+)$")
+
+def build_announcement(week_start, tasks_week):
     embed = discord.Embed(title=f"Tâches semaine {week_start}")
-    for t in tasks_week:
-        claimer_ids = json.loads(t.get("claimed_by") or "[]")
-        claimer_names = ", ".join([f"<@{i}>" for i in claimer_ids]) or "(personne)"
-        status = "✅" if t.get("completed") else "🔲"
-        embed.add_field(name=f"#{t['id']} {status} {t['title']}", value=f"Due {t['due_date']} — Claimers: {claimer_names}", inline=False)
-    
     view = View(timeout=None)
-    for t in [tt for tt in tasks_week if tt.get('completed') == 0]:
+    for t, (name, value) in zip(tasks_week, announcement_fields(week_start, tasks_week)):
+        embed.add_field(name=name, value=value, inline=False)
+        if t['completed']:
+            continue
         task_id = t['id']
-        btn_claim = Button(label=f"Claim #{task_id}", style=discord.ButtonStyle.secondary, custom_id=f"claim_{task_id}")
-        btn_complete = Button(label=f"Complete #{task_id}", style=discord.ButtonStyle.success, custom_id=f"complete_{task_id}")
-
-        async def make_claim_callback(interaction, task_id=task_id):
-            claim_task(task_id, interaction.user.id)
-            await refresh_announcement(interaction.message, week_start)
-            await interaction.response.send_message(f"Vous avez claimé la tâche #{task_id}.", ephemeral=True)
-        
-        async def make_complete_callback(interaction, task_id=task_id):
-            tdata = get_task(task_id)
-            claimed = json.loads(tdata.get('claimed_by') or '[]')
-            if interaction.user.id in claimed or interaction.user.guild_permissions.manage_messages:
-                complete_task(task_id)
-                await refresh_announcement(interaction.message, week_start)
-                await interaction.response.send_message(f"Tâche #{task_id} marquée comme complétée.", ephemeral=True)
-            else:
-                await interaction.response.send_message("Vous devez être claimé pour marquer cette tâche comme complétée.", ephemeral=True)
-        
-        btn_claim.callback = make_claim_callback
-        btn_complete.callback = make_complete_callback
-        view.add_item(btn_claim)
-        view.add_item(btn_complete)
+        view.add_item(Button(label=f"Claim #{task_id}", style=discord.ButtonStyle.secondary, custom_id=f"claim_{task_id}"))
+        view.add_item(Button(label=f"Complete #{task_id}", style=discord.ButtonStyle.success, custom_id=f"complete_{task_id}"))
+    # Clicks are dispatched by on_interaction via their custom_id. A stopped view is still
+    # rendered but never kept in discord.py's view store, so nothing is held per message.
+    view.stop()
+    return view, embed
+
+async def on_claim_button(interaction, task_id):
+    t, tasks_week = await asyncio.to_thread(claim_task, task_id, interaction.user.id)
+    return t, tasks_week, f"Vous avez claimé la tâche #{task_id}."
+
+async def on_complete_button(interaction, task_id):
+    if not (is_claimed_by(task_id, interaction.user.id) or interaction.user.guild_permissions.manage_messages):
+        await interaction.response.send_message("Vous devez être claimé sur cette tâche pour la marquer comme complétée.", ephemeral=True)
+        return None
+    t, tasks_week = await asyncio.to_thread(complete_task, task_id, fetch_week=True)
+    return t, tasks_week, f"Tâche #{task_id} marquée comme complétée."
+
+_BUTTON_ACTIONS = {"claim": on_claim_button, "complete": on_complete_button}
+
+@bot.event
+async def on_interaction(interaction):
+    if interaction.type != discord.InteractionType.component or interaction.message is None:
+        return
+    m = _CUSTOM_ID_RE.match(interaction.data.get("custom_id", ""))
+    if not m:
+        return
+    task_id = int(m[2])
+    result = await _BUTTON_ACTIONS[m[1]](interaction, task_id)
+    if result is None:
+        return
+    t, tasks_week, reply = result
+    if not t:
+        await interaction.response.send_message("Tâche introuvable.", ephemeral=True)
+        return
+    week_start = get_announcement_for_message(interaction.message.id) or t['week_start']
+    await refresh_announcement(interaction.message, week_start, task_id, tasks_week)
+    await interaction.response.send_message(reply, ephemeral=True)
+
+async def refresh_announcement(message, week_start, task_id=None, tasks_week=None):
+    if tasks_week is None:
+        tasks_week = get_tasks_for_week(week_start)
+    tasks_shown = tasks_for_message(message, tasks_week, task_id)
+    if not tasks_shown:
+        return
+    view, embed = build_announcement(week_start, tasks_shown)
 
     try:
         await message.edit(embed=embed, view=view)
@@ -340,9 +508,8 @@ async def _complete(ctx, task_id: int):
     if not t:
         await ctx.send("Tâche introuvable.")
         return
-    claimed = json.loads(t.get('claimed_by') or '[]')
-    if ctx.author.id in claimed or ctx.author.guild_permissions.manage_messages:
-        complete_task(task_id)
+    if is_claimed_by(task_id, ctx.author.id) or ctx.author.guild_permissions.manage_messages:
+        await asyncio.to_thread(complete_task, task_id)
         await ctx.send(f"Tâche #{task_id} marquée comme complétée.")
     else:
         await ctx.send("Vous devez être claimé pour compléter cette tâche.")
@@ -353,16 +520,14 @@ async def _deletetask(ctx, task_id: int):
         await ctx.send("❌ Vous n'avez pas la permission de supprimer des tâches.")
         return
     
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM tasks WHERE id = ?", (task_id, ))
-    row = c.fetchone()
-    if not row:
+    if not get_task(task_id):
         await ctx.send(f"❌ Tâche #{task_id} introuvable.")
         return
     
-    c.execute("DELETE FROM tasks WHERE id = ?", (task_id, ))
-    conn.commit()
+    conn = get_conn()
+    with _write_lock:
+        conn.execute(SQL_DELETE_TASK, (task_id,))
+        conn.commit()
     await ctx.send(f"🗑️ Tâche #{task_id} supprimée avec succès.")
 
 @bot.command(name="gantt")
@@ -373,55 +538,54 @@ async def _gantt(ctx):
     if not os.path.exists(GANTT_IMAGE_PATH):
         await ctx.send("Erreur: l'image de Gantt n'est pas disponible.")
         return
-    img_bytes = overlay_gantt_with_today(GANTT_IMAGE_PATH, GANTT_START, GANTT_END)
+    img_bytes = await asyncio.to_thread(overlay_gantt_with_today, GANTT_IMAGE_PATH, GANTT_START, GANTT_END)
     await ctx.send(file=discord.File(fp=img_bytes, filename="gantt.png"))
 
 @bot.command(name="progress")
 async def _progress(ctx, week_start: str = None):
     if week_start is None:
-        today = date.today()
-        week_start = (today - timedelta(days=today.weekday())).isoformat()
-    tasks_week = get_tasks_for_week(week_start)
-    if not tasks_week:
+        week_start = _monday_iso(date.today().toordinal())
+    try:
+        week_start = _monday_iso(parse_date(week_start).toordinal())
+    except ValueError:
+        await ctx.send("Date de début de semaine invalide. Format attendu: YYYY-MM-DD")
+        return
+    done, total = get_week_progress(week_start)
+    if not total:
         await ctx.send("Aucune tâche pour cette semaine.")
         return
-    total = len(tasks_week)
-    done = sum(1 for t in tasks_week if t.get('completed'))
-    pct = int(done / total * 100) if total else 0
-    bar_length = 20
-    filled = int(bar_length * done / total) if total else 0
-    bar = "█" * filled + "▁" * (bar_length - filled)
-    await ctx.send(f"Progression semaine {week_start}: {done}/{total} ({pct}%)\n{bar}")
+    pct = done * 100 // total
+    filled = PROGRESS_BAR_LENGTH * done // total
+    await ctx.send(f"Progression semaine {week_start}: {done}/{total} ({pct}%)\n{'█' * filled}{'▁' * (PROGRESS_BAR_LENGTH - filled)}")
 
 @tasks.loop(minutes=REMINDER_LOOP_MINUTES)
 async def check_deadlines():
     logger.info("Vérification des échéances...")
-    conn = get_conn()
-    c = conn.cursor()
-    now = datetime.utcnow()
+    now = datetime.now()
     soon = now + timedelta(hours=REMINDER_HOURS)
-    c.execute("SELECT * FROM tasks WHERE completed = 0")
-    rows = c.fetchall()
-    for r in rows:
-        due = None
-        try:
-            due = datetime.fromisoformat(r['due_date'])
-        except Exception:
-            try:
-                due = datetime.strptime(r['due_date'], "%Y-%m-%d")
-            except Exception:
-                continue
-        if now <= due <= soon:
-            claimed = json.loads(r['claimed_by'] or '[]')
-            channel = bot.get_channel(PROJECT_CHANNEL_ID)
-            if channel is None:
-                logger.warning("Salon de projet introuvable (ID %s)", PROJECT_CHANNEL_ID)
-                continue
-            if claimed:
-                mentions = " ".join([f"<@{i}>" for i in claimed])
-                await channel.send(f"Rappel: la tâche #{r['id']} **{r['title']}** est due le {r['due_date']} — {mentions}")
-            else:
-                await channel.send(f"Rappel: la tâche #{r['id']} **{r['title']}** est due le {r['due_date']} — personne ne s'est encore positionné.")
+    rows = await asyncio.to_thread(get_due_tasks, int(now.timestamp()), int(soon.timestamp()))
+    if not rows:
+        return
+    channel = bot.get_channel(PROJECT_CHANNEL_ID)
+    if channel is None:
+        logger.warning("Salon de projet introuvable (ID %s)", PROJECT_CHANNEL_ID)
+        return
+    semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+    async def send_reminder(r):
+        claimed = r['claimers'].split(",") if r['claimers'] else []
+        if claimed:
+            mentions = " ".join([f"<@{i}>" for i in claimed])
+            msg = f"Rappel: la tâche #{r['id']} **{r['title']}** est due le {r['due_date']} — {mentions}"
+        else:
+            msg = f"Rappel: la tâche #{r['id']} **{r['title']}** est due le {r['due_date']} — personne ne s'est encore positionné."
+        async with semaphore:
+            await channel.send(msg)
+
+    results = await asyncio.gather(*(send_reminder(r) for r in rows), return_exceptions=True)
+    for r, result in zip(rows, results):
+        if isinstance(result, Exception):
+            logger.error("Impossible d'envoyer le rappel pour la tâche #%s: %s", r['id'], result)
 
 def run():
     if not DISCORD_TOKEN: